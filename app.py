@@ -6,11 +6,17 @@ A Flask web application that allows users to login with Steam
 and verify if they meet gaming qualification criteria.
 """
 
+import json
 import os
 import re
-from flask import Flask, render_template, redirect, url_for, session, request
+import threading
+from queue import Queue
+
+from cachetools import TTLCache
+from flask import (Flask, Response, render_template, redirect, url_for,
+                   session, request, stream_with_context)
 from dotenv import load_dotenv
-from steam_checker import SteamChecker
+from steam_checker import SteamChecker, create_session
 
 # Load environment variables
 load_dotenv()
@@ -20,6 +26,45 @@ app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key-change-in-product
 
 STEAM_API_KEY = os.getenv('STEAM_API_KEY')
 
+# One connection pool for the whole process, shared by every check
+steam_session = create_session()
+
+# Computed criteria per steam_id, so a refresh of /check within the TTL
+# costs no Steam calls at all. Per-process; swap for a Redis backend if
+# this ever runs across multiple hosts.
+_results_cache = TTLCache(maxsize=10_000, ttl=300)
+
+# Rate-limited partial results, served exactly once instead of being
+# cached: the page still shows the incomplete count with its notice,
+# but the user's retry re-runs the check after the backoff window
+# rather than re-reading the same partial result for the whole TTL
+_partial_results = {}
+
+# Checks currently running, by steam_id, so two open streams for the
+# same user share one crawl instead of both hitting Steam
+_inflight_checks = {}
+
+# Guards the three tables above. TTLCache is not thread-safe — even
+# get() mutates it by evicting expired entries — and they are touched
+# from gunicorn's request threads and the per-stream check workers.
+_check_lock = threading.Lock()
+
+
+# Compiled once at import rather than per request. [0-9] rather than
+# isdigit()/\d so Unicode digits that Steam would reject are refused here.
+_OPENID_RE = re.compile(r'^https://steamcommunity\.com/openid/id/([0-9]{17})$')
+_STEAMID_RE = re.compile(r'^[0-9]{17}$')
+
+# Valid SteamID64 range for individual accounts
+_STEAMID_MIN = 76561197960265728
+_STEAMID_MAX = 76561202255233024
+
+
+def is_valid_steam_id(steam_id):
+    """Check that a string is a plausible 17-digit SteamID64."""
+    return (_STEAMID_RE.match(steam_id) is not None
+            and _STEAMID_MIN <= int(steam_id) < _STEAMID_MAX)
+
 
 def validate_steam_openid(claimed_id):
     """
@@ -31,9 +76,8 @@ def validate_steam_openid(claimed_id):
     Returns:
         Steam ID if valid, None otherwise
     """
-    pattern = r'https://steamcommunity.com/openid/id/(\d+)'
-    match = re.match(pattern, claimed_id)
-    if match:
+    match = _OPENID_RE.match(claimed_id)
+    if match and is_valid_steam_id(match.group(1)):
         return match.group(1)
     return None
 
@@ -65,7 +109,9 @@ def authenticate():
     if claimed_id:
         steam_id = validate_steam_openid(claimed_id)
         if steam_id:
-            session['steam_id'] = steam_id
+            # Canonical int form: parsed once here, used as-is for API
+            # params and cache keys downstream
+            session['steam_id'] = int(steam_id)
             return redirect(url_for('check'))
 
     # If no claimed_id or invalid, show manual input form
@@ -76,15 +122,20 @@ def authenticate():
 def manual_auth():
     """Allow manual Steam ID input for testing."""
     steam_id = request.form.get('steam_id')
-    if steam_id and steam_id.isdigit() and len(steam_id) == 17:
-        session['steam_id'] = steam_id
+    if steam_id and is_valid_steam_id(steam_id):
+        session['steam_id'] = int(steam_id)
         return redirect(url_for('check'))
     return redirect(url_for('index'))
 
 
 @app.route('/check')
 def check():
-    """Check qualification status for the logged-in user."""
+    """Show qualification status for the logged-in user.
+
+    A cached result renders immediately; otherwise the progress page is
+    served, which drives the actual check over /check/stream and comes
+    back here once the result is cached.
+    """
     steam_id = session.get('steam_id')
 
     if not steam_id:
@@ -94,18 +145,96 @@ def check():
         return render_template('error.html',
                              error='Steam API key not configured')
 
-    # Run the qualification check
-    checker = SteamChecker(STEAM_API_KEY, steam_id)
-    results = checker.check_qualifications()
-
-    if 'error' in results:
-        return render_template('error.html', error=results['error'])
+    with _check_lock:
+        results = _results_cache.get(steam_id)
+        if results is None:
+            results = _partial_results.pop(steam_id, None)
+    if results is None:
+        return render_template('checking.html')
 
     return render_template('results.html',
                          steam_id=steam_id,
                          results=results)
 
 
+@app.route('/check/stream')
+def check_stream():
+    """Run the qualification check, streaming progress as SSE.
+
+    Emits {"checked": k, "total": n} events while the per-game calls
+    complete and a final {"done": true} once the result is cached, so
+    the browser sees progress immediately instead of one multi-second
+    blocking response.
+    """
+    steam_id = session.get('steam_id')
+
+    if not steam_id or not STEAM_API_KEY:
+        return redirect(url_for('index'))
+
+    # The check runs in a worker thread that caches its own result, so
+    # a client disconnect mid-stream doesn't discard the finished crawl;
+    # the generator below is a pure event relay
+    def run_check(check, events):
+        # The finally block must always run: a leaked in-flight entry
+        # would make every later stream for this user wait forever
+        results = None
+        try:
+            checker = SteamChecker(STEAM_API_KEY, steam_id, session=steam_session)
+            results = checker.check_qualifications(
+                progress=lambda completed, total: events.put(('progress', completed, total)))
+            check['error'] = results.get('error')
+        except Exception:
+            app.logger.exception("Qualification check failed for %s", steam_id)
+            check['error'] = 'Qualification check failed unexpectedly'
+        finally:
+            with _check_lock:
+                if results is not None and not check['error']:
+                    if results.get('rate_limited'):
+                        _partial_results[steam_id] = results
+                    else:
+                        _results_cache[steam_id] = results
+                del _inflight_checks[steam_id]
+            check['done'].set()
+            events.put(('done',))
+
+    def generate():
+        with _check_lock:
+            cached = _results_cache.get(steam_id) is not None
+        if cached:
+            yield f"data: {json.dumps({'done': True, 'error': None})}\n\n"
+            return
+
+        events = Queue()
+        with _check_lock:
+            check = _inflight_checks.get(steam_id)
+            if check is None:
+                check = {'done': threading.Event(), 'error': None}
+                _inflight_checks[steam_id] = check
+                threading.Thread(target=run_check, args=(check, events),
+                                 daemon=True).start()
+            else:
+                events = None
+
+        if events is None:
+            # Another stream is already running this user's check; just
+            # relay its completion, with comment lines as keep-alives
+            while not check['done'].wait(timeout=2):
+                yield ": waiting\n\n"
+            yield f"data: {json.dumps({'done': True, 'error': check['error']})}\n\n"
+            return
+
+        while True:
+            event = events.get()
+            if event[0] == 'done':
+                yield f"data: {json.dumps({'done': True, 'error': check['error']})}\n\n"
+                return
+            _, completed, total = event
+            yield f"data: {json.dumps({'checked': completed, 'total': total})}\n\n"
+
+    return Response(stream_with_context(generate()),
+                    mimetype='text/event-stream')
+
+
 @app.route('/logout')
 def logout():
     """Clear session and logout."""
@@ -118,4 +247,7 @@ if __name__ == '__main__':
     os.makedirs('templates', exist_ok=True)
     os.makedirs('static', exist_ok=True)
 
+    # Development server only — serves one request at a time. In
+    # production run under gunicorn (see README) so concurrent /check
+    # requests don't queue behind each other.
     app.run(debug=True, port=5000)
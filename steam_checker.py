@@ -9,68 +9,259 @@ Checks if a Steam account meets the following criteria:
 - No more than 50% playtime in single game
 """
 
+import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from requests_cache import CachedSession
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
 
 load_dotenv()
 
 STEAM_API_KEY = os.getenv('STEAM_API_KEY')
 STEAM_ID = os.getenv('STEAM_ID')
 
+logger = logging.getLogger(__name__)
+
+# Connect/read timeout applied to every Steam API call. The read side
+# is kept short so a hung socket can't stall a whole check.
+REQUEST_TIMEOUT = (3.05, 5)
+
+# Stop fanning out per-game calls after this many consecutive failures;
+# at that point Steam is almost certainly down or throttling us.
+BREAKER_FAIL_MAX = 5
+
+# Worker threads for the per-game stats fan-out. Kept below the
+# session's pool_maxsize so every worker gets a pooled connection.
+MAX_WORKERS = 16
+
+# Cap on in-flight Steam calls, below MAX_WORKERS, to stay clear of
+# Steam's rate limits.
+_steam_rate_limit = threading.Semaphore(8)
+
+# Backoff applied when Steam rate-limits us without a Retry-After header
+RATE_LIMIT_BACKOFF_SECONDS = 30
+
+# Monotonic deadline before which no new Steam calls are attempted.
+# Process-wide: one 429 pauses every in-flight check, not just the one
+# that tripped it.
+_backoff_until = 0.0
+
+
+def _in_backoff() -> bool:
+    return time.monotonic() < _backoff_until
+
+
+def _note_rate_limit(retry_after: Optional[str]):
+    """Open the backoff window from a 429's Retry-After header."""
+    global _backoff_until
+    try:
+        delay = float(retry_after)
+    except (TypeError, ValueError):
+        delay = RATE_LIMIT_BACKOFF_SECONDS
+    _backoff_until = max(_backoff_until, time.monotonic() + delay)
+
+
+# How long cached Steam responses stay fresh. Achievement lists change
+# slowly, so an hour collapses repeat checks to local SQLite reads.
+CACHE_EXPIRE_SECONDS = 3600
+
+
+def _aggregate_playtimes(playtimes: np.ndarray):
+    """Return (total_minutes, count_over_1hr, argmax) for a playtime column.
+
+    Written as one scalar loop so numba, when installed, compiles it
+    into a single fused pass; otherwise the NumPy fallback below is
+    bound instead.
+    """
+    total = 0
+    count_over = 0
+    best = -1
+    best_idx = 0
+    for i in range(playtimes.shape[0]):
+        value = playtimes[i]
+        total += value
+        if value > 60:
+            count_over += 1
+        if value > best:
+            best = value
+            best_idx = i
+    return total, count_over, best_idx
+
+
+try:
+    from numba import njit
+    _aggregate_playtimes = njit(cache=True)(_aggregate_playtimes)
+except ImportError:
+    # Without numba the interpreted loop would be slower than three
+    # separate array reductions, so use those.
+    def _aggregate_playtimes(playtimes: np.ndarray):
+        return int(playtimes.sum()), int((playtimes > 60).sum()), int(playtimes.argmax())
+
+
+def create_session() -> requests.Session:
+    """Build a pooled, disk-cached session for Steam API calls.
+
+    The many per-game calls against api.steampowered.com reuse one
+    TCP/TLS connection instead of paying a fresh handshake per request,
+    and responses are cached in SQLite keyed by URL+params so repeat
+    checks within the TTL make no HTTP calls at all.
+    """
+    session = CachedSession(
+        cache_name='steam',
+        backend='sqlite',
+        expire_after=CACHE_EXPIRE_SECONDS,
+        allowable_methods=['GET']
+    )
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=32,
+        # 429 is deliberately not in the forcelist: retrying into a
+        # rate-limit window just extends it. It surfaces to the caller,
+        # which records Retry-After and pauses the fan-out instead.
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[500, 502, 503, 504]
+        )
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
 class SteamChecker:
-    def __init__(self, api_key: str, steam_id: str):
+    def __init__(self, api_key: str, steam_id: int, session: Optional[requests.Session] = None):
         self.api_key = api_key
-        self.steam_id = steam_id
+        # Canonical int form; raises early on a malformed ID instead of
+        # sending garbage to Steam, and digit strings from the CLI/.env
+        # still coerce cleanly
+        self.steam_id = int(steam_id)
         self.base_url = "http://api.steampowered.com"
 
-    def get_owned_games(self) -> Optional[Dict]:
-        """Fetch all owned games with playtime information."""
-        url = f"{self.base_url}/IPlayerService/GetOwnedGames/v0001/"
-        params = {
-            'key': self.api_key,
+        # Static query params built once instead of per call.
+        # include_appinfo would ship name/icon metadata for every owned
+        # game, roughly 10x the payload; the one name we display comes
+        # from the per-game achievements response instead.
+        self._owned_params = {
+            'key': api_key,
             'steamid': self.steam_id,
             'format': 'json',
-            'include_appinfo': True,
+            'include_appinfo': False,
             'include_played_free_games': True
         }
+        self._stats_base_params = {
+            'key': api_key,
+            'steamid': self.steam_id
+        }
+
+        # A long-lived caller (e.g. the web app) can pass in a shared
+        # session so its connection pool survives across checks; we only
+        # own (and close) sessions we created ourselves.
+        self._owns_session = session is None
+        self.session = session if session is not None else create_session()
+
+    def close(self):
+        """Release the pooled HTTP connections, if we own them."""
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_owned_games(self) -> Optional[Dict]:
+        """Fetch all owned games with playtime information."""
+        url = f"{self.base_url}/IPlayerService/GetOwnedGames/v0001/"
 
         try:
-            response = requests.get(url, params=params)
+            response = self.session.get(url, params=self._owned_params, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching owned games: {e}")
+            return orjson.loads(response.content)
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+            logger.warning("Error fetching owned games: %s", e)
             return None
 
-    def get_user_stats(self, app_id: int, game_name: str = "") -> Optional[Dict]:
-        """Fetch user stats for a specific game."""
-        url = f"{self.base_url}/ISteamUserStats/GetUserStatsForGame/v0002/"
-        params = {
-            'appid': app_id,
-            'key': self.api_key,
-            'steamid': self.steam_id
-        }
+    def get_player_achievements(self, app_id: int) -> Optional[Dict]:
+        """Fetch the player's achievement list for a specific game.
+
+        Uses GetPlayerAchievements rather than GetUserStatsForGame: it
+        carries only the achieved flags we need, not the full stats
+        block, so the payload and parse cost are a fraction of the size.
 
+        Returns None for games Steam answers with a client error —
+        400 for apps with no achievement schema, 403 for private
+        profiles. Timeouts, connection errors and 5xx propagate as
+        RequestException so the caller can tell a failing API apart
+        from a game with no achievements.
+        """
+        url = f"{self.base_url}/ISteamUserStats/GetPlayerAchievements/v0001/"
+        params = self._stats_base_params | {'appid': app_id}
+
+        with _steam_rate_limit:
+            response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 429:
+            _note_rate_limit(response.headers.get('Retry-After'))
         try:
-            response = requests.get(url, params=params)
             response.raise_for_status()
-            data = response.json()
-
-            if data and 'playerstats' in data:
-                achievements = data['playerstats'].get('achievements', [])
-                unlocked = sum(1 for ach in achievements if ach.get('achieved') == 1)
-                if unlocked > 0:
-                    print(f"  ✓ {game_name} ({app_id}): {unlocked} achievements")
-                return data
-        except requests.exceptions.RequestException as e:
-            print(f"  ✗ {game_name} ({app_id}): {str(e)}")
+        except requests.exceptions.HTTPError:
+            # Client errors are real answers about this game (no
+            # schema, private profile, rate limit), not signs the API
+            # is down, so they must not feed the circuit breaker
+            if response.status_code < 500:
+                return None
+            raise
+        try:
+            data = orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            # A 200 with a non-JSON body (e.g. a proxy error page) is
+            # no data for this game, not an API outage for the breaker
             return None
 
-    def check_qualifications(self) -> Dict:
-        """Check if the account meets all qualification criteria."""
-        print("Fetching Steam account data...")
+        if data and data.get('playerstats', {}).get('success'):
+            return data
+        return None
+
+    def get_app_name(self, app_id: int) -> Optional[str]:
+        """Look up a game's display name from the storefront API.
+
+        Fallback for the rare case where the achievements fan-out
+        didn't produce a name: the owned-games list is fetched without
+        appinfo, so a most-played game with no achievement schema has
+        no name on any response we already hold.
+        """
+        url = "https://store.steampowered.com/api/appdetails"
+        params = {'appids': app_id, 'filters': 'basic'}
+
+        try:
+            response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+            entry = data.get(str(app_id), {})
+            if entry.get('success'):
+                return entry.get('data', {}).get('name')
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+            logger.warning("Error fetching name for app %s: %s", app_id, e)
+        return None
+
+    def check_qualifications(self, progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """Check if the account meets all qualification criteria.
+
+        When given, ``progress`` is called as ``progress(completed,
+        total)`` after each per-game call finishes, so callers such as
+        the web app can stream progress while the fan-out runs.
+        """
+        logger.info("Fetching Steam account data...")
 
         games_data = self.get_owned_games()
         if not games_data or 'response' not in games_data:
@@ -80,26 +271,105 @@ class SteamChecker:
         if not games:
             return {'error': 'No games found'}
 
-        # Calculate stats
-        total_playtime_minutes = sum(game.get('playtime_forever', 0) for game in games)
+        # One pass over the games list builds both the playtime column
+        # and the list of games worth a stats fetch; every statistic
+        # after this point comes from array reductions, so the dicts are
+        # never walked again
+        playtime_list = []
+        to_check = []
+        for game in games:
+            playtime = game.get('playtime_forever', 0)
+            playtime_list.append(playtime)
+            if playtime > 0:
+                to_check.append((playtime, game))
+
+        playtimes = np.asarray(playtime_list, dtype=np.int64)
+        total_minutes, over_1hr_count, most_played_idx = _aggregate_playtimes(playtimes)
+        total_playtime_minutes = int(total_minutes)
         total_playtime_hours = total_playtime_minutes / 60
-        games_over_1hr = [game for game in games if game.get('playtime_forever', 0) > 60]
-        most_played_game = max(games, key=lambda x: x.get('playtime_forever', 0))
-        most_played_percentage = (most_played_game.get('playtime_forever', 0) / total_playtime_minutes * 100) if total_playtime_minutes > 0 else 0
+        games_over_1hr = int(over_1hr_count)
+        most_played_idx = int(most_played_idx)
+        most_played_game = games[most_played_idx]
+        most_played_appid = most_played_game.get('appid')
+        # Resolved from the achievements fan-out below; the most-played
+        # game sorts first, so its response arrives in the first chunk
+        most_played_name = most_played_game.get('name', 'Unknown')
+        most_played_percentage = (playtimes[most_played_idx] / total_playtime_minutes * 100) if total_playtime_minutes > 0 else 0
 
-        # Count achievements
-        print("\nCounting achievements across all games...")
-        print("(This may take a while...)\n")
+        # Count achievements, fanning the per-game calls out over a
+        # thread pool since each one is an independent HTTP round-trip.
+        # Games are checked in descending playtime order and submitted
+        # one worker-sized chunk at a time: once the 10-achievement
+        # threshold is crossed and the other criteria already pass, the
+        # verdict can't change, so the remaining calls are skipped.
+        logger.info("Counting achievements across all games...")
         total_achievements = 0
+        games_checked = 0
+        completed = 0
+        consecutive_failures = 0
+        rate_limited = False
 
-        for game in games:
-            if game.get('playtime_forever', 0) > 0:
-                game_name = game.get('name', 'Unknown')
-                stats_data = self.get_user_stats(game['appid'], game_name)
-                if stats_data and 'playerstats' in stats_data:
-                    achievements = stats_data['playerstats'].get('achievements', [])
-                    unlocked = sum(1 for ach in achievements if ach.get('achieved') == 1)
-                    total_achievements += unlocked
+        to_check.sort(key=lambda item: item[0], reverse=True)
+        other_criteria_met = (
+            total_playtime_hours >= 100 and
+            games_over_1hr >= 3 and
+            most_played_percentage <= 50
+        )
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            for start in range(0, len(to_check), MAX_WORKERS):
+                if _in_backoff():
+                    # Steam told us to back off; attempting the rest of
+                    # the calls would only deepen the lockout
+                    logger.warning("Steam rate limit hit, skipping remaining games")
+                    rate_limited = True
+                    break
+                chunk = to_check[start:start + MAX_WORKERS]
+                futures = {
+                    executor.submit(self.get_player_achievements, game['appid']): game['appid']
+                    for _, game in chunk
+                }
+                for future in as_completed(futures):
+                    try:
+                        stats_data = future.result()
+                    except requests.exceptions.RequestException:
+                        consecutive_failures += 1
+                        stats_data = None
+                    else:
+                        consecutive_failures = 0
+                    completed += 1
+                    if progress is not None:
+                        progress(completed, len(to_check))
+                    if stats_data and 'playerstats' in stats_data:
+                        playerstats = stats_data['playerstats']
+                        achievements = playerstats.get('achievements', [])
+                        # achieved is always 0 or 1 in Steam's schema,
+                        # so summing it directly skips the filter branch
+                        total_achievements += sum(ach.get('achieved', 0) for ach in achievements)
+                        games_checked += 1
+                        if futures[future] == most_played_appid:
+                            most_played_name = playerstats.get('gameName', most_played_name)
+                if other_criteria_met and total_achievements >= 10:
+                    break
+                if consecutive_failures >= BREAKER_FAIL_MAX:
+                    # Circuit breaker: Steam is failing every call, so
+                    # further requests would only burn the worker's time
+                    logger.warning("Stopping after %d consecutive failed calls", consecutive_failures)
+                    break
+
+        # The per-chunk test above can't see 429s that arrive during
+        # the last chunk, so re-check the backoff window after the join
+        # lest an undercounted result pass as complete
+        rate_limited = rate_limited or _in_backoff()
+
+        logger.info("Checked %d games: %d achievements unlocked", games_checked, total_achievements)
+
+        # The fan-out normally yields the most-played game's name, but
+        # not if that game has no achievement schema or its call was
+        # skipped by the rate-limit/breaker stop; one storefront lookup
+        # fills the gap
+        if most_played_name == 'Unknown' and most_played_appid:
+            most_played_name = self.get_app_name(most_played_appid) or 'Unknown'
 
         # Check criteria
         criteria = {
@@ -107,15 +377,16 @@ class SteamChecker:
             'playtime_100hrs': total_playtime_hours >= 100,
             'total_achievements': total_achievements,
             'achievements_10plus': total_achievements >= 10,
-            'games_over_1hr': len(games_over_1hr),
-            'games_3plus_over_1hr': len(games_over_1hr) >= 3,
-            'most_played_game': most_played_game.get('name', 'Unknown'),
-            'most_played_percentage': round(most_played_percentage, 2),
+            'games_over_1hr': games_over_1hr,
+            'games_3plus_over_1hr': games_over_1hr >= 3,
+            'most_played_game': most_played_name,
+            'most_played_percentage': round(float(most_played_percentage), 2),
             'no_more_than_50pct_single_game': most_played_percentage <= 50,
+            'rate_limited': rate_limited,
             'qualifies': (
                 total_playtime_hours >= 100 and
                 total_achievements >= 10 and
-                len(games_over_1hr) >= 3 and
+                games_over_1hr >= 3 and
                 most_played_percentage <= 50
             )
         }
@@ -154,6 +425,8 @@ def print_results(results: Dict):
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     if not STEAM_API_KEY or STEAM_API_KEY == 'your_api_key_here':
         print("Error: Please set STEAM_API_KEY in the .env file")
         exit(1)
@@ -162,6 +435,6 @@ if __name__ == "__main__":
         print("Error: Please set STEAM_ID in the .env file")
         exit(1)
 
-    checker = SteamChecker(STEAM_API_KEY, STEAM_ID)
-    results = checker.check_qualifications()
+    with SteamChecker(STEAM_API_KEY, STEAM_ID) as checker:
+        results = checker.check_qualifications()
     print_results(results)